@@ -6,7 +6,7 @@ BASE_URL="${FHIR_BASE_URL:-https://hl7int-server.com/server/fhir}"
 
 RESP=$(mktemp)
 trap "rm -f $RESP" EXIT
-HTTP_CODE=$(curl -s -w %{http_code} -o "$RESP" -X GET "${BASE_URL}/Patient/$summary?identifier=L03_3_T04")
+HTTP_CODE=$(curl -s -w %{http_code} -o "$RESP" -X GET "${BASE_URL}/Patient/\$summary?identifier=L03_3_T04")
 if [[ "$HTTP_CODE" =~ ^2 ]]; then
   echo "[OK] HTTP $HTTP_CODE"
   exit 0
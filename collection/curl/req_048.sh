@@ -6,7 +6,7 @@ BASE_URL="${FHIR_BASE_URL:-https://hl7int-server.com/server/fhir}"
 
 RESP=$(mktemp)
 trap "rm -f $RESP" EXIT
-HTTP_CODE=$(curl -s -w %{http_code} -o "$RESP" -X POST -H "Content-Type: application/fhir+json" -H "Accept: application/fhir+json" -d @"req_048.json" "${BASE_URL}/Patient/$validate")
+HTTP_CODE=$(curl -s -w %{http_code} -o "$RESP" -X POST -H "Content-Type: application/fhir+json" -H "Accept: application/fhir+json" -d @"req_048.json" "${BASE_URL}/Patient/\$validate")
 if [[ "$HTTP_CODE" =~ ^2 ]]; then
   echo "[OK] HTTP $HTTP_CODE"
   exit 0
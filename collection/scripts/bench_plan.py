@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark: requests.plan vs the curl/ script tree.
+
+Both are dispatched in run-all.sh order against a local stub FHIR server (always HTTP 200),
+so the numbers measure client-side load + dispatch cost, not server work.
+- load:      script tree = read run-all.sh, parse each .sh (method/URL/headers), read its
+             .json body as curl -d @file does; plan = mmap requests.plan and read every body slice
+             in run order (SHA-256 checked against the index, so all body bytes are read)
+- dispatch:  script tree = run each ./<ID>.sh (bash + curl per operation);
+             plan = request_plan.Dispatcher over one keep-alive connection
+
+Usage:
+  python3 scripts/postman_to_curl.py --plan-only   # rebuilds requests.plan from curl/
+  python3 scripts/bench_plan.py [--load-runs N] [--dispatch-runs N]
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from request_plan import PLAN_FILE, Dispatcher, Plan
+
+COLLECTION_DIR = PLAN_FILE.parent
+CURL_DIR = COLLECTION_DIR / "curl"
+RUN_ALL = COLLECTION_DIR / "run-all.sh"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _reply(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        if n:
+            self.rfile.read(n)
+        body = b'{"resourceType":"OperationOutcome"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/fhir+json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/fhir"
+
+
+def script_tree_ids() -> list:
+    return re.findall(r"^\./(\S+)\.sh$", RUN_ALL.read_text(encoding="utf-8"), re.M)
+
+
+def load_script_tree() -> list:
+    """Parse the script tree into (method, url, headers, body bytes), as a runner must today."""
+    ops = []
+    for op_id in script_tree_ids():
+        sh = (CURL_DIR / f"{op_id}.sh").read_text(encoding="utf-8")
+        method = re.search(r"-X (\w+)", sh).group(1)
+        url = re.search(r'"\$\{BASE_URL\}/([^"]*)"', sh).group(1)
+        headers = re.findall(r'-H "([^:]+): ([^"]*)"', sh)
+        body = b""
+        m = re.search(r'-d @"([^"]+)"', sh)
+        if m:
+            body = (CURL_DIR / m.group(1)).read_bytes()
+        ops.append((method, url, headers, body))
+    return ops
+
+
+def load_plan():
+    with Plan(PLAN_FILE) as plan:
+        for op_id in plan.sequence:
+            op = plan.operations[op_id]
+            body = plan.body(op)
+            if hashlib.sha256(body).hexdigest() != op["sha256"]:
+                raise RuntimeError(f"{op_id}: body does not match sha256")
+            body.release()
+
+
+def dispatch_script_tree(base_url: str):
+    env = dict(os.environ, FHIR_BASE_URL=base_url)
+    for op_id in script_tree_ids():
+        result = subprocess.run(["bash", f"./{op_id}.sh"], cwd=CURL_DIR, env=env, capture_output=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{op_id}: {result.stdout.decode()[:200]}")
+
+
+def dispatch_plan(base_url: str):
+    with Plan(PLAN_FILE) as plan:
+        dispatcher = Dispatcher(base_url)
+        try:
+            for op_id in plan.sequence:
+                status, _ = dispatcher.send(plan, plan.operations[op_id])
+                if status != 200:
+                    raise RuntimeError(f"{op_id}: HTTP {status}")
+        finally:
+            dispatcher.close()
+
+
+def timed(fn, runs: int, *args) -> float:
+    """Median wall time in milliseconds."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark requests.plan against the curl/ script tree")
+    parser.add_argument("--load-runs", type=int, default=50, help="Repetitions for load timing (default: 50)")
+    parser.add_argument("--dispatch-runs", type=int, default=5, help="Repetitions for dispatch timing (default: 5)")
+    args = parser.parse_args()
+
+    if not PLAN_FILE.exists() or not RUN_ALL.exists():
+        print(f"Plan not found: {PLAN_FILE} (run scripts/postman_to_curl.py --plan-only)", file=sys.stderr)
+        sys.exit(1)
+    with Plan(PLAN_FILE) as plan:
+        if plan.stale():
+            print("Plan is out of date with curl/ (run scripts/postman_to_curl.py --plan-only)", file=sys.stderr)
+            sys.exit(1)
+
+    server, base_url = start_stub_server()
+    try:
+        n_ops = len(script_tree_ids())
+        results = [
+            ("load", timed(load_script_tree, args.load_runs), timed(load_plan, args.load_runs)),
+            ("load + dispatch", timed(dispatch_script_tree, args.dispatch_runs, base_url),
+             timed(dispatch_plan, args.dispatch_runs, base_url)),
+        ]
+    finally:
+        server.shutdown()
+
+    print(f"{n_ops} operations, median of runs (ms)")
+    print(f"{'':<16} {'script tree':>12} {'plan':>10} {'speedup':>8}")
+    for label, tree_ms, plan_ms in results:
+        print(f"{label:<16} {tree_ms:>12.2f} {plan_ms:>10.2f} {tree_ms / plan_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,25 @@ Convert Postman FHIR collection to curl scripts.
 - Replaces {{host}} and {{host_ips}} with BASE_URL
 - Converts XML bodies to FHIR JSON (proper FHIR structure, not raw xmltodict)
 - Replaces all Patient extensions with new_extension.json
+- Also writes requests.plan: the operations of curl/ precompiled into one file (see request_plan.py).
+  The plan is compiled from the curl/ scripts and the .json bodies they send, so manual edits
+  there are kept; --plan-only rebuilds it without regenerating the scripts.
 
 For XML->JSON: Uses xmltodict + FHIR-aware post-processing. Alternative: use
 https://fhir-formats.github.io/ for manual conversion, or fhir.resources[xml]
 (pip install "fhir.resources[xml]") for programmatic conversion (Python 3.10+).
 """
 
+import argparse
+import hashlib
 import json
 import os
 import re
 import sys
 from pathlib import Path
 
+from request_plan import PLAN_FILE, compact_body, write_plan
+
 # XML to JSON: use xmltodict (pip install xmltodict)
 try:
     import xmltodict
@@ -279,6 +286,141 @@ def get_content_type(headers: list) -> str:
     return "application/fhir+json"
 
 
+def relative_path(url: str) -> str:
+    """Path+query of url relative to the FHIR base (/server/fhir or /fhir), without leading slash."""
+    from urllib.parse import urlparse
+    if url.startswith("http"):
+        parsed = urlparse(url)
+        path_q = parsed.path.rstrip("/") or ""
+        if parsed.query:
+            path_q += "?" + parsed.query
+        # Path relative to /server/fhir or /fhir
+        for prefix in ("/server/fhir", "/fhir"):
+            if path_q.startswith(prefix):
+                path_q = path_q[len(prefix):].lstrip("/") or ""
+                break
+    else:
+        path_q = url.replace(BASE_URL, "").strip("/") or ""
+    return path_q
+
+
+def request_headers(method: str, headers: list, body: str) -> list:
+    """Headers actually sent for a request, as (key, value) pairs in curl order."""
+    out = []
+    for h in headers or []:
+        key = h.get("key")
+        if key and key.lower() not in ("content-type",) and h.get("value"):
+            out.append((key, h.get("value")))
+    if body and method in ("POST", "PUT", "PATCH"):
+        out.append(("Content-Type", get_content_type(headers)))
+        out.append(("Accept", "application/fhir+json"))
+    return out
+
+
+def _conditional_keys(url: str) -> set:
+    """"Type?identifier=system|value" URL -> {"Type|value"}."""
+    rtype = re.split(r"[/?]", url, 1)[0]
+    return {f"{rtype}|{m.group(1).split('|')[-1]}" for m in re.finditer(r"identifier=([^&]+)", url)}
+
+
+def _references(obj):
+    """All Reference.reference strings in a JSON value."""
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if k == "reference" and isinstance(v, str):
+                yield v
+            else:
+                yield from _references(v)
+    elif isinstance(obj, list):
+        for item in obj:
+            yield from _references(item)
+
+
+def _identifier_keys(path: str, body: bytes) -> set:
+    """Resources an operation touches, as "Type|identifier value": its own conditional URL, bundle
+    entry request URLs, identifier[].value of the resources it sends, and conditional references
+    (Patient?identifier=...) in those resources."""
+    keys = _conditional_keys(path)
+    resources = []
+    data = None
+    if body:
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError:
+            pass
+    if isinstance(data, dict):
+        if data.get("resourceType") == "Bundle":
+            for entry in data.get("entry") or []:
+                keys |= _conditional_keys((entry.get("request") or {}).get("url") or "")
+                resources.append(entry.get("resource") or {})
+        else:
+            resources.append(data)
+        for ref in _references(data):
+            if "?" in ref:
+                keys |= _conditional_keys(ref)
+    for res in resources:
+        for ident in res.get("identifier") or []:
+            if isinstance(ident, dict) and ident.get("value"):
+                keys.add(f"{res.get('resourceType')}|{ident['value']}")
+    return keys
+
+
+def declare_dependencies(operations: list, sequence: list):
+    """Set depends_on: for each run of an operation in sequence (run-all.sh order), the write
+    operation (PUT/POST/DELETE, not $operations) that last touched a resource it touches."""
+    by_id = {op["id"]: op for op in operations}
+    keys = {op["id"]: _identifier_keys(op["path"], op["body"]) for op in operations}
+    for op in operations:
+        op["depends_on"] = []
+    last_writer = {}
+    for op_id in sequence:
+        op = by_id[op_id]
+        for key in sorted(keys[op_id]):
+            writer = last_writer.get(key)
+            if writer and writer != op_id and writer not in op["depends_on"]:
+                op["depends_on"].append(writer)
+        if op["method"] in ("PUT", "POST", "DELETE") and "$" not in op["path"]:
+            for key in keys[op_id]:
+                last_writer[key] = op_id
+
+
+def compile_plan() -> int:
+    """Compile requests.plan from run-all.sh and the curl/ scripts, reading the .json body each
+    script sends, so the plan matches what run-all.sh sends. Returns the number of operations."""
+    sources = {}
+
+    def read_source(path: Path) -> str:
+        data = path.read_bytes()
+        sources[path.relative_to(COLLECTION_DIR).as_posix()] = hashlib.sha256(data).hexdigest()
+        return data.decode("utf-8")
+
+    run_all = read_source(COLLECTION_DIR / "run-all.sh")
+    sequence = re.findall(r"^\./(\S+)\.sh$", run_all, re.M)
+    operations = []
+    for op_id in dict.fromkeys(sequence):
+        sh = read_source(OUTPUT_DIR / f"{op_id}.sh")
+        desc = re.search(rf"^# {re.escape(op_id)}: (.*)$", sh, re.M)
+        curl_line = re.search(r"^HTTP_CODE=\$\((curl .*)\)$", sh, re.M).group(1)
+        body_file = re.search(r'-d @"([^"]+)"', curl_line)
+        body = read_source(OUTPUT_DIR / body_file.group(1)) if body_file else ""
+        compacted = compact_body(body)
+        try:
+            assert json.loads(compacted) == json.loads(body), f"{op_id}: minified body differs"
+        except json.JSONDecodeError:
+            pass  # not JSON: sent as written
+        operations.append({
+            "id": op_id,
+            "description": desc.group(1) if desc else "",
+            "method": re.search(r"-X (\w+)", curl_line).group(1),
+            "path": re.search(r'"\$\{BASE_URL\}/([^"]*)"', curl_line).group(1).replace("\\$", "$"),
+            "headers": re.findall(r'-H "([^:"]+): ([^"]*)"', curl_line),
+            "body": compacted,
+        })
+    declare_dependencies(operations, sequence)
+    write_plan(PLAN_FILE, operations, sequence, BASE_URL, sources)
+    return len(operations)
+
+
 def to_curl(
     method: str,
     url: str,
@@ -289,7 +431,6 @@ def to_curl(
     description: str,
 ):
     """Write curl command to shell script file."""
-    from urllib.parse import urlparse
     lines = [
         "#!/usr/bin/env bash",
         f"# {op_id}: {description}",
@@ -299,33 +440,19 @@ def to_curl(
         "",
     ]
     # Extract path+query from full URL for use with BASE_URL
-    if url.startswith("http"):
-        parsed = urlparse(url)
-        path_q = parsed.path.rstrip("/") or ""
-        if parsed.query:
-            path_q += "?" + parsed.query
-        # Path relative to /server/fhir or /fhir
-        for prefix in ("/server/fhir", "/fhir"):
-            if path_q.startswith(prefix):
-                path_q = path_q[len(prefix):].lstrip("/") or ""
-                break
-    else:
-        path_q = url.replace(BASE_URL, "").strip("/") or ""
+    path_q = relative_path(url)
     # Use trailing slash when path is empty - many servers (e.g. nginx) return 301 without it
+    # Escape $ so operation names ($summary, $validate) are not expanded by the shell
     if path_q:
+        path_q = path_q.replace("$", "\\$")
         url_expr = f'"${{BASE_URL}}/{path_q}"'
     else:
         url_expr = '"${BASE_URL}/"'
 
     curl_parts = ["curl", "-s", "-w", "%{http_code}", "-o", '"$RESP"', "-X", method]
-    for h in headers or []:
-        key = h.get("key")
-        if key and key.lower() not in ("content-type",) and h.get("value"):
-            curl_parts.append(f'-H "{key}: {h.get("value")}"')
+    for key, value in request_headers(method, headers, body):
+        curl_parts.append(f'-H "{key}: {value}"')
     if body and method in ("POST", "PUT", "PATCH"):
-        ct = get_content_type(headers)
-        curl_parts.append(f'-H "Content-Type: {ct}"')
-        curl_parts.append('-H "Accept: application/fhir+json"')
         # Write body to companion .json file to avoid shell escaping issues
         body_file = output_file.with_suffix(".json")
         body_file.write_text(body, encoding="utf-8")
@@ -352,6 +479,15 @@ def to_curl(
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Convert Postman FHIR collection to curl scripts")
+    parser.add_argument("--plan-only", action="store_true",
+                        help="Only rebuild requests.plan from the existing curl/ scripts")
+    args = parser.parse_args()
+    if args.plan_only:
+        n_ops = compile_plan()
+        print(f"Plan: {PLAN_FILE.name} ({n_ops} operations) compiled from {OUTPUT_DIR}")
+        return
+
     if not COLLECTION_FILE.exists():
         print(f"Collection not found: {COLLECTION_FILE}", file=sys.stderr)
         sys.exit(1)
@@ -470,9 +606,13 @@ def main():
     run_one.write_text("\n".join(run_one_content), encoding="utf-8")
     run_one.chmod(0o755)
 
+    # Precompiled plan from the scripts just written
+    n_ops = compile_plan()
+
     print(f"Generated {len(ids)} curl scripts in {OUTPUT_DIR}")
     print("Run all: ./run-all.sh")
     print("Run one: ./run.sh <ID>")
+    print(f"Plan: {PLAN_FILE.name} ({n_ops} operations)")
     print("IDs:", ", ".join(ids[:10]), "..." if len(ids) > 10 else "")
 
 
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Precompiled request plan: one file holding every operation of the curl/ script tree.
+
+Layout (little-endian):
+  8s   magic  b"FHIRPLAN"
+  u32  format version (PLAN_VERSION)
+  u32  index length N
+  N    index: compact UTF-8 JSON
+         {"version", "base_url", "sequence": [op ids in run-all order],
+          "sources": {path relative to collection/: sha256},
+          "operations": [{"id", "description", "method", "path", "headers": [[k, v]],
+                          "body_offset", "body_length", "sha256", "depends_on": [op ids]}]}
+  ...  body blob: compact JSON request bodies, concatenated in operation order
+
+"path" is relative to the FHIR base URL (same as ${BASE_URL}/<path> in the curl scripts).
+Body offsets are relative to the start of the blob, so a runner can mmap the file and send
+body slices as-is, or stream it front to back (index first, then bodies in order).
+"sources" holds the SHA-256 of run-all.sh and each .sh/.json the plan was compiled from;
+Plan.stale() lists the ones that changed since, and the runner refuses a stale plan.
+
+Run operations from the plan (like run-all.sh / run.sh):
+  python3 scripts/request_plan.py             # all, in sequence
+  python3 scripts/request_plan.py L01_1_T02   # one or more IDs
+"""
+
+import hashlib
+import http.client
+import json
+import mmap
+import os
+import re
+import socket
+import struct
+import sys
+from pathlib import Path
+from urllib.parse import urlparse
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+COLLECTION_DIR = SCRIPT_DIR.parent
+PLAN_FILE = COLLECTION_DIR / "requests.plan"
+
+PLAN_MAGIC = b"FHIRPLAN"
+PLAN_VERSION = 2
+_HEADER = struct.Struct("<8sII")
+
+
+# A JSON string literal, or a run of insignificant whitespace between tokens
+_JSON_STRING_OR_SPACE = re.compile(r'("(?:[^"\\]|\\.)*")|[ \t\n\r]+', re.S)
+
+
+def compact_body(body: str) -> bytes:
+    """Minify a JSON request body to UTF-8 (raw text if it is not JSON). Only whitespace outside
+    strings is dropped: tokens are kept as written, since FHIR decimals carry their precision."""
+    if not body:
+        return b""
+    try:
+        json.loads(body)
+    except json.JSONDecodeError:
+        return body.encode("utf-8")
+    return _JSON_STRING_OR_SPACE.sub(lambda m: m.group(1) or "", body).encode("utf-8")
+
+
+def write_plan(path: Path, operations: list, sequence: list, base_url: str, sources: dict):
+    """
+    Write a plan file. operations: dicts with id, description, method, path, headers
+    ([(key, value)]), body (bytes) and depends_on; sequence: op ids in run order;
+    sources: {path relative to collection/: sha256} of the files the plan was compiled from.
+    """
+    index_ops = []
+    offset = 0
+    for op in operations:
+        body = op["body"]
+        index_ops.append({
+            "id": op["id"],
+            "description": op["description"],
+            "method": op["method"],
+            "path": op["path"],
+            "headers": [list(h) for h in op["headers"]],
+            "body_offset": offset,
+            "body_length": len(body),
+            "sha256": hashlib.sha256(body).hexdigest(),
+            "depends_on": list(op["depends_on"]),
+        })
+        offset += len(body)
+    index = json.dumps(
+        {"version": PLAN_VERSION, "base_url": base_url, "sequence": list(sequence),
+         "sources": dict(sources), "operations": index_ops},
+        separators=(",", ":"),
+        ensure_ascii=False,
+    ).encode("utf-8")
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(PLAN_MAGIC, PLAN_VERSION, len(index)))
+        f.write(index)
+        for op in operations:
+            f.write(op["body"])
+    tmp.replace(path)
+
+
+class Plan:
+    """Memory-mapped plan file. body(op) returns a zero-copy memoryview into the mapping."""
+
+    def __init__(self, path: Path = PLAN_FILE):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f"Not a request plan: {path}")
+        magic, version, index_len = _HEADER.unpack_from(self._map, 0)
+        if magic != PLAN_MAGIC:
+            self.close()
+            raise ValueError(f"Not a request plan: {path}")
+        if version != PLAN_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported plan version {version} (expected {PLAN_VERSION}): {path}")
+        index_start = _HEADER.size
+        self._blob_start = index_start + index_len
+        index = json.loads(self._map[index_start:self._blob_start].decode("utf-8"))
+        self.base_url = index["base_url"]
+        self.sequence = index["sequence"]
+        self.sources = index["sources"]
+        self.operations = {op["id"]: op for op in index["operations"]}
+        self._view = memoryview(self._map)
+
+    def body(self, op: dict) -> memoryview:
+        start = self._blob_start + op["body_offset"]
+        return self._view[start:start + op["body_length"]]
+
+    def verify(self) -> list:
+        """Return IDs whose body does not match the recorded sha256."""
+        return [op_id for op_id, op in self.operations.items()
+                if hashlib.sha256(self.body(op)).hexdigest() != op["sha256"]]
+
+    def stale(self, root: Path = COLLECTION_DIR) -> list:
+        """Return source files (relative to root) changed or removed since the plan was compiled."""
+        changed = []
+        for name, digest in self.sources.items():
+            path = root / name
+            if not path.is_file() or hashlib.sha256(path.read_bytes()).hexdigest() != digest:
+                changed.append(name)
+        return changed
+
+    def close(self):
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+            self._view = None
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Dispatcher:
+    """Sends plan operations over one keep-alive connection to the FHIR base URL."""
+
+    def __init__(self, base_url: str, timeout: int = 30):
+        parsed = urlparse(base_url.rstrip("/"))
+        conn_cls = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        self._conn = conn_cls(parsed.hostname, parsed.port, timeout=timeout)
+        self._prefix = parsed.path
+
+    def send(self, plan: Plan, op: dict):
+        """Send one operation. Returns (status, response bytes)."""
+        if self._conn.sock is None:
+            self._conn.connect()
+            # Body goes out as a separate write (memoryview is not merged with headers); avoid Nagle stalls
+            self._conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        body = plan.body(op) if op["body_length"] else None
+        headers = dict(op["headers"])
+        if body is not None:
+            headers["Content-Length"] = str(op["body_length"])
+        try:
+            self._conn.request(op["method"], f"{self._prefix}/{op['path']}", body=body, headers=headers)
+        finally:
+            if body is not None:
+                body.release()
+        resp = self._conn.getresponse()
+        return resp.status, resp.read()
+
+    def close(self):
+        self._conn.close()
+
+
+def main():
+    base_url = os.environ.get("FHIR_BASE_URL", "")
+    if not PLAN_FILE.exists():
+        print(f"Plan not found: {PLAN_FILE} (run scripts/postman_to_curl.py --plan-only)", file=sys.stderr)
+        sys.exit(1)
+    with Plan(PLAN_FILE) as plan:
+        stale = plan.stale()
+        if stale:
+            print(f"Plan is out of date with curl/ ({', '.join(stale[:5])}{' ...' if len(stale) > 5 else ''}); "
+                  f"rebuild it with scripts/postman_to_curl.py --plan-only", file=sys.stderr)
+            sys.exit(1)
+        ids = sys.argv[1:] or plan.sequence
+        unknown = [op_id for op_id in ids if op_id not in plan.operations]
+        if unknown:
+            print(f"Unknown ID: {unknown[0]}", file=sys.stderr)
+            sys.exit(1)
+        dispatcher = Dispatcher(base_url or plan.base_url)
+        failed = 0
+        try:
+            for op_id in ids:
+                try:
+                    status, resp_body = dispatcher.send(plan, plan.operations[op_id])
+                except (OSError, http.client.HTTPException) as e:
+                    print(f"[ERROR] {op_id}: {e}", file=sys.stderr)
+                    sys.exit(1)
+                if 200 <= status < 300:
+                    print(f"[OK] {op_id} HTTP {status}")
+                else:
+                    failed += 1
+                    print(f"[FAIL] {op_id} HTTP {status}")
+                    print("\n".join(resp_body.decode("utf-8", errors="replace").splitlines()[:20]))
+        finally:
+            dispatcher.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
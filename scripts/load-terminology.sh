@@ -28,6 +28,9 @@
 #   SNOMED CT International (free license at https://www.snomed.org/):
 #     SnomedCT_InternationalRF2_PRODUCTION_YYYYMMDDT120000Z.zip
 #
+# For multi-GB packages, scripts/upload_terminology.py streams the upload from disk,
+# verifies checksums, retries dropped connections and skips already-loaded versions.
+#
 # =============================================================================
 
 set -euo pipefail
@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+"""
+Stream LOINC / SNOMED CT terminology zips to HAPI FHIR via CodeSystem/$upload-external-code-system.
+
+Alternative to the hapi-fhir-cli step in load-terminology.sh for large packages:
+- Streams the request body from disk (zip is base64-encoded chunk by chunk, never held in memory
+  by this client; HAPI still decodes inline data in memory)
+- Packages whose inline request would exceed what HAPI can decode (Java's 2^31 String/array
+  limit, about 1.6 GB of zips) are sent as localfile: attachment URLs with --server-dir, as
+  hapi-fhir-cli does above its transfer limit - HAPI then reads the zips from its own filesystem.
+  Without --server-dir such packages are refused with an error instead of failing on the server
+- Shows progress, throughput and ETA while sending
+- Verifies SHA-256 against a sidecar file (<zip>.sha256) or --sha256, and re-checks it while streaming
+- Polls HAPI for the CodeSystem in a background thread while the upload runs, then waits for
+  concepts to become resolvable ($lookup) instead of sleeping
+- Skips packages already loaded on the target server: LOINC by the version HAPI stores (sent
+  as loinc.codesystem.version in a loincupload.properties attachment); SNOMED CT, which HAPI
+  stores unversioned, by the CodeSystem id + meta.lastUpdated recorded after this tool's upload
+- Retries connections dropped while sending with backoff; once the whole body is sent it is never
+  re-sent (a read timeout means HAPI is still importing - the poller waits for the CodeSystem).
+  Completed uploads are recorded in a state file so a re-run resumes with the packages not yet loaded
+
+HAPI's upload operation takes the whole package in one request (there is no partial-upload
+protocol), so a retry re-sends that package from the start - but from disk, not from memory.
+
+Usage:
+  python3 scripts/upload_terminology.py [-t URL] [-d DIR] [--skip-loinc] [--skip-snomed]
+                                        [--server-dir DIR] [FILE ...]
+"""
+
+import argparse
+import base64
+import hashlib
+import http.client
+import json
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote, urlencode, urlparse
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError, URLError
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = SCRIPT_DIR.parent
+DEFAULT_DATA_DIR = PROJECT_DIR / "terminology-data"
+DEFAULT_TARGET_URL = os.environ.get("FHIR_BASE_URL", "http://localhost:8023/fhir")
+STATE_FILE_NAME = ".upload-state.json"
+
+# Raw bytes per read; a multiple of 3 so each chunk base64-encodes without padding
+CHUNK_SIZE = 3 * 256 * 1024
+RETRYABLE_STATUS = frozenset({502, 503, 504})
+# HAPI reads the JSON request and decodes Attachment.data in memory; a Java String/array holds
+# at most 2^31-1 elements, so an inline request (base64 = 4/3 of the zips) must stay below it
+MAX_INLINE_BODY = 2 ** 31 - 1 - 8
+
+LOINC_SYSTEM = "http://loinc.org"
+SNOMED_SYSTEM = "http://snomed.info/sct"
+
+# system -> (filename patterns, probe code used to confirm concepts are loaded)
+TERMINOLOGIES = {
+    LOINC_SYSTEM: (("Loinc_*.zip", "LOINC_*_Text.zip", "LOINC_*_MULTI-AXIAL*.zip"), "15074-8"),
+    SNOMED_SYSTEM: (("SnomedCT_*.zip",), "138875005"),
+}
+
+
+def log(msg):
+    print(f"[{time.strftime('%Y-%m-%dT%H:%M:%S')}] {msg}", flush=True)
+
+
+def version_from_filename(system: str, name: str):
+    """Derive package version from the release file name (Loinc_2.78.zip, SnomedCT_*_20251015T120000Z.zip)."""
+    if system == LOINC_SYSTEM:
+        m = re.search(r"LOINC_(\d+\.\d+)", name, re.I)
+    else:
+        m = re.search(r"_(\d{8})T\d{6}Z", name)
+    return m.group(1) if m else None
+
+
+def stored_version(system: str, version):
+    """Version HAPI will store for the upload: LOINC takes it from loincupload.properties (which
+    upload_package sends); SNOMED CT RF2 uploads are stored without a version."""
+    return version if system == LOINC_SYSTEM else None
+
+
+def extra_attachments(system: str, version) -> list:
+    """In-memory files sent with the package: (name, content type, bytes)."""
+    if system == LOINC_SYSTEM and version:
+        props = f"loinc.codesystem.version={version}\n".encode("utf-8")
+        return [("loincupload.properties", "text/plain", props)]
+    return []
+
+
+def find_packages(data_dir: Path, skip_loinc: bool, skip_snomed: bool) -> dict:
+    """Return {system: [zip paths]} for terminology zips found in data_dir."""
+    found = {}
+    for system, (patterns, _) in TERMINOLOGIES.items():
+        if (system == LOINC_SYSTEM and skip_loinc) or (system == SNOMED_SYSTEM and skip_snomed):
+            continue
+        files = []
+        for pattern in patterns:
+            for p in sorted(data_dir.glob(pattern)):
+                if p not in files:
+                    files.append(p)
+        if files:
+            found[system] = files
+    return found
+
+
+def releases_in(system: str, files: list) -> dict:
+    """Group files by release: {version (or file name when unknown): [paths]}."""
+    releases = {}
+    for p in files:
+        releases.setdefault(version_from_filename(system, p.name) or p.name, []).append(p)
+    return releases
+
+
+def system_for_file(path: Path):
+    for system, (patterns, _) in TERMINOLOGIES.items():
+        if any(path.match(p) for p in patterns):
+            return system
+    return None
+
+
+# -----------------------------------------------------------------------------
+# Checksums and upload state
+# -----------------------------------------------------------------------------
+
+def load_state(state_file: Path) -> dict:
+    if not state_file.exists():
+        return {"checksums": {}, "uploads": []}
+    with open(state_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state_file: Path, state: dict):
+    tmp = state_file.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    tmp.replace(state_file)
+
+
+def sha256_file(path: Path, state: dict) -> str:
+    """SHA-256 of path; cached in state by (size, mtime) so multi-GB zips are hashed once."""
+    st = path.stat()
+    key = str(path.resolve())
+    cached = state["checksums"].get(key)
+    if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+        return cached["sha256"]
+    log(f"Computing SHA-256 of {path.name} ({st.st_size / 1e6:.1f} MB)...")
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    state["checksums"][key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+    return digest
+
+
+def expected_sha256(path: Path, override: str = None):
+    """Expected checksum from --sha256 or a <zip>.sha256 sidecar (sha256sum format)."""
+    if override:
+        return override.strip().lower()
+    sidecar = path.with_name(path.name + ".sha256")
+    if sidecar.exists():
+        return sidecar.read_text(encoding="utf-8").split()[0].strip().lower()
+    return None
+
+
+# -----------------------------------------------------------------------------
+# FHIR server queries
+# -----------------------------------------------------------------------------
+
+def fhir_get(url: str, timeout: int = 30):
+    """GET JSON from the FHIR server. Returns (status, body dict or None)."""
+    req = Request(url, headers={"Accept": "application/fhir+json"})
+    try:
+        with urlopen(req, timeout=timeout) as resp:
+            return resp.getcode(), json.loads(resp.read().decode("utf-8") or "null")
+    except HTTPError as e:
+        return e.code, None
+    except (URLError, socket.timeout, ConnectionError, http.client.HTTPException, json.JSONDecodeError):
+        return 0, None
+
+
+def find_code_systems(base_url: str, system: str, version: str = None) -> list:
+    params = {"url": system, "_summary": "true"}
+    if version:
+        params["version"] = version
+    code, bundle = fhir_get(f"{base_url}/CodeSystem?{urlencode(params)}")
+    if code != 200 or not bundle:
+        return []
+    return [e.get("resource", {}) for e in bundle.get("entry") or []]
+
+
+def code_resolves(base_url: str, system: str, code: str, version: str = None) -> bool:
+    params = {"system": system, "code": code}
+    if version:
+        params["version"] = version
+    params = urlencode(params)
+    status, _ = fhir_get(f"{base_url}/CodeSystem/$lookup?{params}")
+    return status == 200
+
+
+def already_loaded(base_url: str, system: str, version, digests: list, state: dict) -> bool:
+    """
+    True when the target server already has this package. Matches on what HAPI stores:
+    CodeSystem.version when one is stored (LOINC), otherwise the CodeSystem id and
+    meta.lastUpdated recorded after this tool uploaded the same files - if the CodeSystem has
+    been replaced since (another upload, load-terminology.sh), lastUpdated no longer matches.
+    """
+    if version and find_code_systems(base_url, system, version):
+        return True
+    recorded = {(u.get("code_system_id"), u.get("last_updated")) for u in state["uploads"]
+                if u["target"] == base_url and u["system"] == system
+                and sorted(u["sha256"]) == sorted(digests) and u.get("code_system_id")}
+    return any((cs.get("id"), (cs.get("meta") or {}).get("lastUpdated")) in recorded
+               for cs in find_code_systems(base_url, system))
+
+
+def _cs_key(cs: dict) -> tuple:
+    return cs.get("id"), cs.get("version"), (cs.get("meta") or {}).get("lastUpdated")
+
+
+class CodeSystemPoller(threading.Thread):
+    """
+    Polls the server for the CodeSystem (and a probe code) while the upload request is in flight.
+    CodeSystems present before the upload are snapshotted when the poller is created; only one
+    that is new or updated since then (a different version or meta.lastUpdated, as stamped by
+    the server) counts as the upload's result, so an older loaded version never reads as ready.
+    """
+
+    def __init__(self, base_url: str, system: str, version, probe_code: str, interval: float):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.system = system
+        self.version = version
+        self.probe_code = probe_code
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()  # poll() also runs on the caller's thread
+        self.seen = {_cs_key(cs) for cs in find_code_systems(base_url, system)}
+        self.code_system = None  # the CodeSystem created/updated by this upload
+        self.fresh = threading.Event()
+        self.ready = threading.Event()
+
+    def poll(self):
+        with self.lock:
+            self._poll()
+
+    def _poll(self):
+        for cs in find_code_systems(self.base_url, self.system):
+            key = _cs_key(cs)
+            if key in self.seen:
+                continue
+            self.seen.add(key)
+            log(f"  [poll] CodeSystem/{cs.get('id')} version={cs.get('version', '-')} "
+                f"content={cs.get('content', '-')} updated={key[2] or '-'}")
+            if not self.version or cs.get("version") == self.version:
+                self.code_system = cs
+                self.fresh.set()
+        if (self.fresh.is_set() and self.probe_code
+                and code_resolves(self.base_url, self.system, self.probe_code, self.version)):
+            self.ready.set()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:  # keep polling; a dead thread would leave fresh/ready waits hanging
+                log(f"  [poll] failed: {type(e).__name__}: {e}")
+            self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+# -----------------------------------------------------------------------------
+# Streaming upload
+# -----------------------------------------------------------------------------
+
+class FileChangedError(Exception):
+    """A zip no longer matches its verified checksum while being streamed."""
+
+
+class ResponseLost(Exception):
+    """The whole body was sent but no response arrived (read timeout, proxy dropped the
+    connection); HAPI may still be loading the package."""
+
+
+def _b64_len(n: int) -> int:
+    return 4 * ((n + 2) // 3)
+
+
+class StreamingParametersBody:
+    """
+    FHIR Parameters body for $upload-external-code-system, produced chunk by chunk:
+    {"resourceType":"Parameters","parameter":[{"name":"system",...},{"name":"file","valueAttachment":{..."data":"<base64>"}}...]}
+    The exact length is known up front so the request carries Content-Length. Each file is
+    re-hashed as it is read and checked against expected[path] before its closing bytes are
+    sent, so a file that changed mid-upload never forms a complete request. references are
+    attachment URLs (localfile:...) sent without data, for HAPI to read from its own filesystem.
+    """
+
+    def __init__(self, system: str, files: list, expected: dict, extra: list = (), references: list = ()):
+        self.system = system
+        self.files = files
+        self.expected = expected
+        self.sizes = {path: path.stat().st_size for path in files}
+        head = '{"resourceType":"Parameters","parameter":[' + json.dumps(
+            {"name": "system", "valueUri": system}, separators=(",", ":"))
+        for name, content_type, data in extra:
+            head += "," + json.dumps({"name": "file", "valueAttachment": {
+                "url": name, "contentType": content_type, "data": base64.b64encode(data).decode("ascii"),
+            }}, separators=(",", ":"))
+        for url in references:
+            head += "," + json.dumps({"name": "file", "valueAttachment": {"url": url}}, separators=(",", ":"))
+        self.head = head.encode("utf-8")
+        self.tail = b"]}"
+        self.parts = []  # (prefix bytes, path, suffix bytes)
+        for path in files:
+            attachment = {"url": path.name, "contentType": "application/zip"}
+            meta = json.dumps(attachment, separators=(",", ":"))[:-1]
+            prefix = ',{"name":"file","valueAttachment":' + meta + ',"data":"'
+            self.parts.append((prefix.encode("utf-8"), path, b'"}}'))
+
+    def __len__(self):
+        return len(self.head) + len(self.tail) + sum(
+            len(p) + _b64_len(self.sizes[path]) + len(s) for p, path, s in self.parts)
+
+    def raw_size(self) -> int:
+        return sum(self.sizes.values())
+
+    def chunks(self):
+        """Yield (encoded bytes, raw bytes consumed) pairs. Raises FileChangedError before a
+        file's closing bytes if what was read does not match its expected checksum."""
+        yield self.head, 0
+        for prefix, path, suffix in self.parts:
+            yield prefix, 0
+            h = hashlib.sha256()
+            remaining = self.sizes[path]
+            with open(path, "rb") as f:
+                while remaining:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    h.update(chunk)
+                    yield base64.b64encode(chunk), len(chunk)
+            streamed = h.hexdigest()
+            if remaining or streamed != self.expected[path]:
+                raise FileChangedError(f"{path.name} changed during upload (streamed sha256={streamed})")
+            yield suffix, 0
+        yield self.tail, 0
+
+
+class Progress:
+    def __init__(self, total: int, label: str):
+        self.total = total
+        self.label = label
+        self.done = 0
+        self.start = time.monotonic()
+        self.last = 0.0
+
+    def update(self, n: int):
+        self.done += n
+        now = time.monotonic()
+        if now - self.last < 0.5 and self.done < self.total:
+            return
+        self.last = now
+        elapsed = max(now - self.start, 1e-6)
+        rate = self.done / elapsed
+        eta = (self.total - self.done) / rate if rate else 0
+        pct = 100.0 * self.done / self.total if self.total else 100.0
+        sys.stderr.write(
+            f"\r  {self.label}: {pct:5.1f}% {self.done / 1e6:,.1f}/{self.total / 1e6:,.1f} MB "
+            f"{rate / 1e6:6.2f} MB/s ETA {int(eta // 60):02d}:{int(eta % 60):02d}   "
+        )
+        if self.done >= self.total:
+            sys.stderr.write("\n")
+        sys.stderr.flush()
+
+
+def stream_upload(base_url: str, body: StreamingParametersBody, label: str, timeout: int):
+    """POST the streamed Parameters body. Returns (status, response text). Raises ResponseLost if
+    the connection fails after the body was completely sent."""
+    parsed = urlparse(f"{base_url}/CodeSystem/$upload-external-code-system")
+    conn_cls = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+    conn = conn_cls(parsed.hostname, parsed.port, timeout=timeout)
+    try:
+        conn.putrequest("POST", quote(parsed.path, safe="/$"))
+        conn.putheader("Content-Type", "application/fhir+json")
+        conn.putheader("Accept", "application/fhir+json")
+        conn.putheader("Content-Length", str(len(body)))
+        conn.endheaders()
+        progress = Progress(body.raw_size(), label)
+        for data, raw in body.chunks():
+            conn.send(data)
+            if raw:
+                progress.update(raw)
+        log("  Body sent; waiting for HAPI to process the package...")
+        try:
+            resp = conn.getresponse()
+            return resp.status, resp.read().decode("utf-8", errors="replace")
+        except (OSError, http.client.HTTPException) as e:
+            raise ResponseLost(str(e) or type(e).__name__) from e
+    finally:
+        conn.close()
+
+
+def upload_package(args, base_url: str, system: str, files: list, state: dict, state_file: Path) -> bool:
+    _, probe_code = TERMINOLOGIES[system]
+    version = version_from_filename(system, files[0].name)
+    log(f"{system} ({', '.join(p.name for p in files)}) version={version or 'unknown'}")
+
+    digests = []
+    for path in files:
+        digest = sha256_file(path, state)
+        save_state(state_file, state)
+        expected = expected_sha256(path, args.sha256)
+        if expected and expected != digest:
+            log(f"ERROR: checksum mismatch for {path.name}: expected {expected}, got {digest}")
+            return False
+        log(f"  {path.name} sha256={digest}{' (verified)' if expected else ''}")
+        digests.append(digest)
+
+    if not args.force and already_loaded(base_url, system, stored_version(system, version), digests, state):
+        log("  Already loaded on target server; skipping (use --force to re-upload).")
+        return True
+
+    hapi_version = stored_version(system, version)
+    extra = extra_attachments(system, version)
+    body = StreamingParametersBody(system, files, dict(zip(files, digests)), extra)
+    if len(body) > MAX_INLINE_BODY:
+        if not args.server_dir:
+            log(f"ERROR: {body.raw_size() / 1e9:.2f} GB of zips is too large to send inline "
+                f"({len(body) / 1e9:.2f} GB request; HAPI cannot decode more than {MAX_INLINE_BODY / 1e9:.2f} GB). "
+                f"Make the zips readable by the HAPI server and pass --server-dir.")
+            return False
+        references = [f"localfile:{args.server_dir.rstrip('/')}/{p.name}" for p in files]
+        log(f"  Too large to send inline; HAPI reads the zips itself: {', '.join(references)}")
+        body = StreamingParametersBody(system, [], {}, extra, references)
+    poller = CodeSystemPoller(base_url, system, hapi_version, probe_code, args.poll_interval)
+    poller.start()
+    try:
+        for attempt in range(1, args.retries + 1):
+            try:
+                status, text = stream_upload(base_url, body, files[0].name, args.timeout)
+            except FileChangedError as e:
+                # Request aborted before it was complete; HAPI has not loaded anything
+                log(f"ERROR: {e}")
+                return False
+            except ResponseLost as e:
+                # HAPI has the whole package and may still be importing it: never re-send, wait for it
+                log(f"  No response after the body was sent ({e}); not re-sending. "
+                    f"Waiting up to {args.wait}s for the new CodeSystem...")
+                if not poller.fresh.wait(args.wait):
+                    log(f"  ERROR: no new {system} CodeSystem after {args.wait}s; check HAPI logs before re-running.")
+                    return False
+                break
+            except (OSError, http.client.HTTPException) as e:
+                status, text = 0, str(e)
+            if status in (200, 201):
+                break
+            retryable = status == 0 or status in RETRYABLE_STATUS
+            log(f"  Upload attempt {attempt}/{args.retries} failed: HTTP {status or '-'} {text[:500]}")
+            if not retryable or attempt == args.retries:
+                return False
+            # The request may have completed server-side before the connection dropped
+            poller.poll()
+            if poller.fresh.is_set():
+                log("  New CodeSystem present on server after dropped connection; not re-sending.")
+                break
+            delay = min(2 ** attempt, 60)
+            log(f"  Retrying in {delay}s...")
+            time.sleep(delay)
+        else:
+            return False
+
+        log(f"  Package loaded by HAPI; waiting for {system}|{probe_code} to resolve in the new CodeSystem...")
+        deadline = time.monotonic() + args.wait
+        if poller.ready.wait(args.wait):
+            log(f"  Concepts are resolvable (CodeSystem/{poller.code_system.get('id')}).")
+        else:
+            log(f"  WARNING: {probe_code} not resolvable after {args.wait}s; HAPI may still be indexing.")
+
+        # Record the CodeSystem as HAPI stores it now, so a re-run can recognise this upload
+        poller.fresh.wait(max(0, deadline - time.monotonic()))
+        record = {
+            "target": base_url,
+            "system": system,
+            "version": version,
+            "files": [p.name for p in files],
+            "sha256": digests,
+            "uploaded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        if poller.code_system:
+            cs_id = poller.code_system.get("id")
+            for cs in find_code_systems(base_url, system, hapi_version):
+                if cs.get("id") == cs_id:
+                    record["code_system_id"] = cs_id
+                    record["last_updated"] = (cs.get("meta") or {}).get("lastUpdated")
+        state["uploads"].append(record)
+        save_state(state_file, state)
+        return True
+    finally:
+        poller.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="*", type=Path, help="Terminology zips (default: discover in --data-dir)")
+    parser.add_argument("-t", "--target-url", default=DEFAULT_TARGET_URL, help="HAPI FHIR base URL")
+    parser.add_argument("-d", "--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="Directory containing terminology zips")
+    parser.add_argument("-s", "--skip-loinc", action="store_true", help="Skip LOINC upload")
+    parser.add_argument("-n", "--skip-snomed", action="store_true", help="Skip SNOMED upload")
+    parser.add_argument("--server-dir", help="Directory where the HAPI server can read the zips (shared volume); "
+                        "packages too large to send inline are sent as localfile: references to it")
+    parser.add_argument("--sha256", help="Expected SHA-256 of the one zip being uploaded (otherwise <zip>.sha256 sidecars are used)")
+    parser.add_argument("--force", action="store_true", help="Upload even if the version is already loaded")
+    parser.add_argument("--retries", type=int, default=3, help="Upload attempts per package (default: 3)")
+    parser.add_argument("--timeout", type=int, default=3600, help="Socket timeout in seconds (default: 3600)")
+    parser.add_argument("--poll-interval", type=float, default=15, help="Seconds between server polls (default: 15)")
+    parser.add_argument("--wait", type=int, default=1800, help="Seconds to wait for the new CodeSystem and its concepts after upload (default: 1800)")
+    args = parser.parse_args()
+    if args.retries < 1:
+        parser.error("--retries must be at least 1")
+
+    base_url = args.target_url.rstrip("/")
+    if args.files:
+        packages = {}
+        for path in args.files:
+            system = system_for_file(path)
+            if not system:
+                print(f"Cannot tell terminology system from file name: {path}", file=sys.stderr)
+                sys.exit(1)
+            if (system == LOINC_SYSTEM and args.skip_loinc) or (system == SNOMED_SYSTEM and args.skip_snomed):
+                continue
+            packages.setdefault(system, []).append(path)
+        state_dir = args.files[0].resolve().parent
+    else:
+        packages = find_packages(args.data_dir, args.skip_loinc, args.skip_snomed)
+        state_dir = args.data_dir
+    if not packages:
+        print(f"No terminology zips found in {args.data_dir}", file=sys.stderr)
+        sys.exit(1)
+    for system, files in packages.items():
+        missing = [p for p in files if not p.is_file()]
+        if missing:
+            print(f"File not found: {missing[0]}", file=sys.stderr)
+            sys.exit(1)
+        # One $upload-external-code-system request loads one release (like head -1 in load-terminology.sh)
+        releases = releases_in(system, files)
+        if len(releases) > 1:
+            print(f"More than one {system} release found: {', '.join(sorted(releases))}. "
+                  f"Pass the files of one release explicitly.", file=sys.stderr)
+            sys.exit(1)
+    if args.sha256 and sum(len(files) for files in packages.values()) != 1:
+        parser.error("--sha256 needs exactly one zip; use <zip>.sha256 sidecars for several")
+
+    status, _ = fhir_get(f"{base_url}/metadata")
+    if status != 200:
+        print(f"HAPI server not ready at {base_url} (HTTP {status or '-'})", file=sys.stderr)
+        sys.exit(1)
+
+    state_file = state_dir / STATE_FILE_NAME
+    state = load_state(state_file)
+    failed = [system for system, files in packages.items()
+              if not upload_package(args, base_url, system, files, state, state_file)]
+    if failed:
+        log(f"Failed: {', '.join(failed)}")
+        sys.exit(1)
+    log("Terminology upload complete.")
+
+
+if __name__ == "__main__":
+    main()